@@ -15,34 +15,127 @@ Usage:
     ...
 """
 
+import queue
 import sqlite3
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from typing import Optional
 
 # -------------------------------------
 # Database file location and structure
 # -------------------------------------
 DB_PATH = Path(__file__).resolve().parent / "app.db"
 
+# Connection tuning applied on every open.
+# journal_mode=WAL is persisted in the DB file (no-op after first run), but
+# synchronous/busy_timeout/temp_store/cache_size are per-connection settings.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA busy_timeout=5000;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-20000;",
+)
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Enables WAL mode and the per-connection PRAGMAs listed above.
+    WAL lets readers proceed during writes and commits do one fsync instead of two.
+    """
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+def utc_timestamp() -> str:
+    """
+    Current UTC time as 'YYYY-MM-DDTHH:MM:SSZ' (same format as the existing TEXT columns),
+    built with time.strftime instead of allocating a datetime per insert.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+# -------------------------------------
+# Per-thread connection pool
+# -------------------------------------
+# Stable INSERT/SELECT strings are compiled once and reused from the statement cache
+STATEMENT_CACHE_SIZE = 128
+
+_local = threading.local()
+_pool: list[sqlite3.Connection] = []
+_pool_lock = threading.Lock()
+
 
 def get_connection() -> sqlite3.Connection:
     """
-    Returns a new SQLite connection.
-    You should always close the connection when done.
+    Returns the long-lived SQLite connection for the current thread.
+    The connection is opened once per thread and reused, so callers must NOT close it
+    (and should not use it as a `with` block). Autocommit mode (isolation_level=None).
     """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # returns dict-like rows
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    _apply_pragmas(conn)
+    # Plain tuple rows (no global row_factory); set one per-cursor where dict access is needed
+    _local.conn = conn
+    with _pool_lock:
+        _pool.append(conn)
     return conn
 
 
+def close_connections() -> None:
+    """
+    Closes every pooled connection. Called from the FastAPI shutdown hook.
+    """
+    with _pool_lock:
+        conns = list(_pool)
+        _pool.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    _local.__dict__.pop("conn", None)
+
+
+# -------------------------------------
+# One-time schema initialization
+# -------------------------------------
+_INITIALIZED = False
+_init_lock = threading.Lock()
+
+
 def init_db() -> None:
     """
     Creates base tables if they don't exist.
-    Called automatically by route modules on first use.
+    Runs once per process (called from the FastAPI startup hook); later calls are no-ops.
+    """
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+    with _init_lock:
+        if _INITIALIZED:
+            return
+        _create_schema()
+        _INITIALIZED = True
+
+
+def _create_schema() -> None:
+    """
+    Executes the CREATE TABLE IF NOT EXISTS statements.
     """
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     with sqlite3.connect(DB_PATH) as conn:
+        _apply_pragmas(conn)
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS analyses (
@@ -57,7 +150,10 @@ def init_db() -> None:
             )
             """
         )
-        
+
+        # username UNIQUE already creates sqlite_autoindex_users_1, so the login lookup
+        # (WHERE username=?) is an index seek; no separate index is needed. The table keeps
+        # its rowid/AUTOINCREMENT id because verify_user returns it.
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS users (
@@ -86,20 +182,127 @@ def init_db() -> None:
         conn.commit()
 
 
+# -------------------------------------
+# Background batched writer
+# -------------------------------------
+# Best-effort writes (audit rows, app_logs) are queued here and flushed by a single
+# daemon thread, many rows per transaction, so request handlers never wait on a commit.
+WRITE_QUEUE_MAXSIZE = 10000
+WRITE_BATCH_SIZE = 200
+
+_WRITE_QUEUE: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_MAXSIZE)
+_STOP = object()  # sentinel to stop the writer thread
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def enqueue_write(sql: str, params: tuple) -> bool:
+    """
+    Queues one INSERT for the background writer.
+    Never blocks: if the queue is full the row is dropped and False is returned.
+    """
+    _ensure_writer()
+    try:
+        _WRITE_QUEUE.put_nowait((sql, params))
+        return True
+    except queue.Full:
+        return False
+
+
+def _ensure_writer() -> None:
+    """
+    Starts the writer thread on first use.
+    """
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _writer_lock:
+        if _writer_thread is None:
+            thread = threading.Thread(target=_writer_loop, name="sqlite-writer", daemon=True)
+            thread.start()
+            _writer_thread = thread
+
+
+def _writer_loop() -> None:
+    """
+    Blocks for one row, drains up to WRITE_BATCH_SIZE more without waiting, then flushes.
+    """
+    while True:
+        item = _WRITE_QUEUE.get()
+        if item is _STOP:
+            return
+        batch = [item]
+        stop = False
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                item = _WRITE_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        _flush_batch(batch)
+        if stop:
+            return
+
+
+def _flush_batch(batch: list[tuple[str, tuple]]) -> None:
+    """
+    Writes a batch in a single transaction (one commit, one fsync), grouping rows by statement.
+    """
+    grouped: dict[str, list[tuple]] = {}
+    for sql, params in batch:
+        grouped.setdefault(sql, []).append(params)
+    conn = None
+    try:
+        conn = get_connection()
+        # Take the write lock upfront; a deferred BEGIN would have to upgrade it mid-batch
+        conn.execute("BEGIN IMMEDIATE")
+        for sql, rows in grouped.items():
+            conn.executemany(sql, rows)
+        conn.execute("COMMIT")
+    except Exception:
+        # Best-effort: drop the batch rather than kill the writer thread
+        if conn is not None:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+
+
+def stop_writer(timeout: float = 5.0) -> None:
+    """
+    Flushes queued rows and stops the writer thread. Called from the FastAPI shutdown hook.
+    """
+    global _writer_thread
+    with _writer_lock:
+        thread = _writer_thread
+        _writer_thread = None
+    if thread is None:
+        return
+    try:
+        _WRITE_QUEUE.put(_STOP, timeout=timeout)
+    except queue.Full:
+        return
+    thread.join(timeout=timeout)
+
+
+_LOG_SQL = """
+    INSERT INTO app_logs (log_time, level, message)
+    VALUES (?, ?, ?)
+"""
+
+
 def log_message(level: str, message: str) -> None:
     """
-    Simple logging helper that writes a log entry into the database.
+    Simple logging helper that queues a log entry for the background writer.
     """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                """
-                INSERT INTO app_logs (log_time, level, message)
-                VALUES (?, ?, ?)
-                """,
-                (datetime.utcnow().isoformat(timespec="seconds") + "Z", level, message),
-            )
-            conn.commit()
+        enqueue_write(
+            _LOG_SQL,
+            (utc_timestamp(), level, message),
+        )
     except Exception:
         # Fails silently to avoid breaking the app during logging
         pass
@@ -24,11 +24,14 @@ from typing import List
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # Fully-qualified imports so module resolution is stable under uvicorn
 from app.route.analyze_route import router as analyze_router
 from app.route.auth_route import router as auth_router
-from app.data.db_config import init_db
+from app.data.db_config import init_db, close_connections, stop_writer
+from app.middleware.gzip_request import GzipRequestMiddleware
+from app.middleware.no_compress import NoCompressMiddleware
 
 APP_ROOT = Path(__file__).resolve().parent
 PROMPTS_DIR = APP_ROOT / "prompts"
@@ -67,6 +70,13 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compression: gzip responses >= 1 KB and inflate gzip request bodies sent by the UI.
+    # SSE routes are exempted explicitly (added after GZip so it runs first); older Starlette
+    # would otherwise gzip-buffer text/event-stream and defeat streaming.
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(NoCompressMiddleware, paths=["/analyze/stream"])
+    app.add_middleware(GzipRequestMiddleware)
+
     # Include API routes
     app.include_router(analyze_router)
     app.include_router(auth_router)
@@ -95,8 +105,9 @@ def create_app() -> FastAPI:
         except Exception as ex:
             logging.warning("DB init warning: %s: %s", type(ex).__name__, ex)
 
-        # Prompt presence check
-        if not SYSTEM_PROMPT_PATH.exists():
+        # Prompt presence check (cached on app.state for /health and /diag)
+        app.state.prompt_exists = SYSTEM_PROMPT_PATH.exists()
+        if not app.state.prompt_exists:
             logging.warning(
                 "System prompt not found at %s. Create this file and paste your spec.",
                 SYSTEM_PROMPT_PATH,
@@ -122,6 +133,12 @@ def create_app() -> FastAPI:
         except Exception as ex:
             logging.warning("Schema import warning: %s: %s", type(ex).__name__, ex)
 
+    @app.on_event("shutdown")
+    def _shutdown():
+        # Flush queued audit rows, then close pooled SQLite connections
+        stop_writer()
+        close_connections()
+
     return app
 
 
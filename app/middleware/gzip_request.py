@@ -0,0 +1,77 @@
+"""
+app/middleware/gzip_request.py
+
+ASGI middleware that accepts gzip-compressed request bodies.
+
+Why?
+- Starlette's GZipMiddleware only compresses *responses*. The Streamlit UI gzips
+  large /analyze bodies (raw logs compress 5-10x), so the server must inflate them
+  before FastAPI parses JSON.
+- Decompressed size is capped so a small "zip bomb" body cannot exhaust memory.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Generous bound above AnalyzeRequest.MAX_INPUT_CHARS (UTF-8 + JSON escaping overhead)
+DEFAULT_MAX_DECOMPRESSED_BYTES = 4 * 1024 * 1024
+
+
+class GzipRequestMiddleware:
+    def __init__(self, app: ASGIApp, max_size: int = DEFAULT_MAX_DECOMPRESSED_BYTES) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = [(k, v) for k, v in scope["headers"] if k != b"content-encoding"]
+        encoding = next((v for k, v in scope["headers"] if k == b"content-encoding"), b"")
+        if encoding.strip().lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        compressed = bytearray()
+        more_body = True
+        while more_body:
+            message = await receive()
+            compressed.extend(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if len(compressed) > self.max_size:
+                await PlainTextResponse("request body too large", status_code=413)(scope, receive, send)
+                return
+
+        try:
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip container
+            body = inflater.decompress(bytes(compressed), self.max_size + 1)
+        except zlib.error:
+            await PlainTextResponse("invalid gzip body", status_code=400)(scope, receive, send)
+            return
+        if len(body) > self.max_size or inflater.unconsumed_tail:
+            await PlainTextResponse("request body too large", status_code=413)(scope, receive, send)
+            return
+        if not inflater.eof:
+            # Truncated gzip stream: reject here rather than hand FastAPI a partial body
+            await PlainTextResponse("invalid gzip body", status_code=400)(scope, receive, send)
+            return
+
+        headers = [(k, v) for k, v in headers if k != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = dict(scope, headers=headers)
+
+        sent = False
+
+        async def receive_inflated() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, receive_inflated, send)
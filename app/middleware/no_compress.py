@@ -0,0 +1,31 @@
+"""
+app/middleware/no_compress.py
+
+ASGI middleware that keeps selected paths out of response compression.
+
+Why?
+- Older Starlette releases gzip every response type, including text/event-stream.
+  GzipFile buffers output until enough data accumulates, so SSE frames from
+  /analyze/stream would arrive in one burst at the end instead of as they are generated.
+- Removing Accept-Encoding from the request scope makes GZipMiddleware (any version)
+  pass these responses through untouched. Must be added *after* GZipMiddleware so it
+  runs first.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class NoCompressMiddleware:
+    def __init__(self, app: ASGIApp, paths: Iterable[str]) -> None:
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.paths:
+            headers = [(k, v) for k, v in scope["headers"] if k != b"accept-encoding"]
+            scope = dict(scope, headers=headers)
+        await self.app(scope, receive, send)
@@ -6,21 +6,26 @@ APIRouter for the AI Security Analyst Assistant.
 Endpoints:
 - GET  /health      -> health check & model info
 - POST /analyze     -> prompt-only security analysis (JSON or Markdown)
+- POST /analyze/stream -> same analysis streamed as Server-Sent Events (text_delta frames)
 
 This revision:
 - Delegates non-HTTP logic to app/services/analyze_service.py
 - Imports Pydantic models from app/schemas/analyze_schema.py
-- Uses centralized DB init from app/data/db_config.py
+- DB init runs once in the FastAPI startup hook (app/main.py), not per request
 """
 
 from __future__ import annotations
 
 import json
-from fastapi import APIRouter, HTTPException
-import os
+import logging
+from typing import AsyncIterator
 
-# DB bootstrap
-from app.data.db_config import init_db
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+# Server-side error logging (app_logs table)
+from app.data.db_config import log_message
 
 # Shared request/response models
 from app.schemas.analyze_schema import (
@@ -32,47 +37,76 @@ from app.schemas.analyze_schema import (
 # Service layer: orchestration + helpers + model constants
 from app.services.analyze_service import (
     run_analysis,
+    stream_analysis,
     try_parse_json,
+    resolve_input,
     OPENAI_MODEL,
+    OPENAI_API_KEY,
     ALLOWED_MODELS,
     PROMPT_PATH,
 )
 
 router = APIRouter(tags=["analysis"])
+logger = logging.getLogger(__name__)
+
+
+def _prompt_exists(request: Request) -> bool:
+    """
+    Prompt presence as checked once at startup (app.state), instead of a stat() per poll.
+    Falls back to a live check if the startup hook has not run.
+    """
+    cached = getattr(request.app.state, "prompt_exists", None)
+    return PROMPT_PATH.exists() if cached is None else cached
+
+
+def _resolved(req: AnalyzeRequest) -> AnalyzeRequest:
+    """
+    Fills input_text for id-only requests; 409 tells the client to resend the full text.
+    """
+    try:
+        return resolve_input(req)
+    except LookupError as ex:
+        raise HTTPException(status_code=409, detail=f"{ex}; resend input_text")
 
 
 @router.get("/diag")
-def diag():
-    key = os.getenv("OPENAI_API_KEY")
+def diag(request: Request):
+    key = OPENAI_API_KEY  # read once at import in the service layer
     return {
         "model": OPENAI_MODEL,
         "api_key_present": bool(key),
         "api_key_length": len(key) if key else 0,
-        "prompt_exists": PROMPT_PATH.exists(),
+        "prompt_exists": _prompt_exists(request),
     }
 
 @router.get("/health")
-def health():
+def health(request: Request):
     """
-    Basic health check. Ensures DB is initialized and reports prompt existence.
+    Basic health check. Reports model info and prompt existence.
     """
-    init_db()
     return {
         "status": "ok",
         "model": OPENAI_MODEL,
         "allowed_models": ALLOWED_MODELS,
-        "prompt_exists": PROMPT_PATH.exists(),
+        "prompt_exists": _prompt_exists(request),
     }
 
 
-@router.post("/analyze", response_model=AnalyzeResponseJSON | AnalyzeResponseMarkdown)
-def analyze(req: AnalyzeRequest):
+@router.post(
+    "/analyze",
+    response_model=None,
+    responses={200: {"model": AnalyzeResponseJSON | AnalyzeResponseMarkdown}},  # docs only
+)
+async def analyze(req: AnalyzeRequest) -> ORJSONResponse:
     """
     Main analysis endpoint:
+    - Async so the event loop, not a threadpool worker, waits on the OpenAI round-trip.
     - Delegates orchestration to the service layer.
     - Returns parsed JSON or raw Markdown per requested output_format.
+    - Serialized directly with orjson; no response-model re-validation of the parsed payload.
     """
-    assistant_text = run_analysis(req)
+    req = _resolved(req)
+    assistant_text = await run_analysis(req)
 
     if req.output_format == "json":
         ok, parsed, err = try_parse_json(assistant_text)
@@ -81,7 +115,47 @@ def analyze(req: AnalyzeRequest):
                 status_code=500,
                 detail=f"Assistant returned invalid JSON. {err}",
             )
-        return AnalyzeResponseJSON(data=parsed)
+        return ORJSONResponse({"data": parsed})
 
     # Markdown path
-    return AnalyzeResponseMarkdown(markdown=assistant_text)
+    return ORJSONResponse({"markdown": assistant_text})
+
+
+def _sse(event: dict) -> bytes:
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+async def _analysis_events(req: AnalyzeRequest) -> AsyncIterator[bytes]:
+    """
+    Wraps stream_analysis() as SSE frames:
+        {"type": "text_delta", "text": ...}  per chunk
+        {"type": "error", "detail": ...}     if the analysis fails mid-stream
+        {"type": "done"}                     at the end
+    """
+    try:
+        async for delta in stream_analysis(req):
+            yield _sse({"type": "text_delta", "text": delta})
+    except Exception as ex:
+        # Headers are already sent, so report failures in-band. Details (which can include
+        # upstream OpenAI error bodies) stay server-side; the client gets a generic message.
+        detail = f"{type(ex).__name__}: {ex}"
+        logger.warning("Analyze stream failed: %s", detail)
+        log_message("ERROR", f"analyze_stream: {detail}")
+        yield _sse({"type": "error", "detail": "Analysis failed. See server logs for details."})
+        return
+    yield _sse({"type": "done"})
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(req: AnalyzeRequest) -> StreamingResponse:
+    """
+    Streaming analysis endpoint: emits assistant text as it is generated (SSE),
+    so clients see output long before the full completion is available.
+    The client is responsible for parsing the concatenated text when output_format='json'.
+    """
+    req = _resolved(req)  # before streaming starts, so a miss is a real 409
+    return StreamingResponse(
+        _analysis_events(req),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
@@ -1,14 +1,26 @@
 from typing import Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# Upper bound on input_text; oversized bodies are rejected (422) during validation,
+# before any prompt is built or sent to OpenAI.
+MAX_INPUT_CHARS = 200_000
 
 class AnalyzeRequest(BaseModel):
-    input_text: str = Field(..., description="Security logs, access records, and/or policy text")
+    input_text: Optional[str] = Field(None, max_length=MAX_INPUT_CHARS, description="Security logs, access records, and/or policy text")
+    # blake2b(input_text, digest_size=16) hex; lets clients omit input_text the server already holds
+    input_id: Optional[str] = Field(None, pattern=r"^[0-9a-f]{32}$", description="Content hash of a previously sent input_text")
     output_format: Literal["json", "markdown"] = "json"
     schema: Literal["risk_assessment", "event_summary", "policy_alignment"] = "risk_assessment"
     # Optional hint to bound the analysis window or provide context strings
     time_window: Optional[str] = Field(None, description="ISO8601 range or descriptive window")
     inputs: Optional[list[str]] = Field(default=None, description='e.g. ["logs","access_records","policy_text"]')
 
+    @model_validator(mode="after")
+    def require_input(self):
+        if self.input_text is None and self.input_id is None:
+            raise ValueError("either input_text or input_id is required")
+        return self
+
 
 class AnalyzeResponseJSON(BaseModel):
     """When output_format='json', we echo the parsed JSON back as dict."""
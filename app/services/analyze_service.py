@@ -7,28 +7,34 @@ Extracts all non-endpoint logic from the analyze route so the router only
 does HTTP I/O and response shaping.
 
 This module provides:
-- load_system_prompt()         -> reads system prompt from app/prompts/system_prompt.txt
+- load_system_prompt()         -> reads system prompt from app/prompts/system_prompt.txt (mtime-cached)
 - build_user_instruction(req)  -> creates minimal user instruction wrapper
-- call_openai(messages)        -> invokes OpenAI chat completion
-- audit_save(...)              -> writes best-effort audit row to SQLite
-- run_analysis(req)            -> orchestrates prompt build + OpenAI call (+ auditing)
+- stream_openai(messages)      -> streams OpenAI chat completion deltas (async generator)
+- call_openai(messages)        -> invokes OpenAI chat completion and joins the stream (async)
+- audit_save(...)              -> queues best-effort audit row for the background SQLite writer
+- run_analysis(req)            -> orchestrates prompt build + OpenAI call (+ auditing) (async)
+- stream_analysis(req)         -> same as run_analysis, yielding text deltas (async generator)
 - try_parse_json(text)         -> small helper to safely parse assistant JSON
+- resolve_input(req)           -> fills input_text from the input_id cache (or caches new text)
 
 Dependencies
 ------------
-- Database helpers: app/data/db_config.py  (init_db, get_connection)
+- Database helpers: app/data/db_config.py  (enqueue_write; init_db runs at startup)
 - Request models:   app/schemas/analyze_schema.py (AnalyzeRequest)
 """
 
 from __future__ import annotations
 
-import json
+import functools
+import hashlib
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from app.data.db_config import init_db, get_connection
+from app.data.db_config import enqueue_write, utc_timestamp
 from app.schemas.analyze_schema import AnalyzeRequest
 
 # -------------------------------------------------------------------
@@ -46,10 +52,33 @@ if OPENAI_MODEL not in ALLOWED_MODELS:
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Audit previews: str slicing copies only the first N characters, never the full text
+INPUT_PREVIEW_CHARS = 500
+RESPONSE_PREVIEW_CHARS = 1000
+
+_AUDIT_SQL = """
+    INSERT INTO analyses
+        (created_at, model, output_format, schema, prompt_chars, input_preview, response_preview)
+    VALUES
+        (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Recently sent input_text, keyed by content hash, so clients can resend only input_id
+INPUT_CACHE_TTL_SEC = 15 * 60
+INPUT_CACHE_MAX = 64
+_INPUT_CACHE: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_input_cache_lock = threading.Lock()
+
+# Fast JSON decoder for model output; falls back to stdlib json if orjson is absent
+try:
+    import orjson as _json  # type: ignore
+except Exception:
+    import json as _json
+
 # OpenAI client (adjust import if your SDK differs)
 try:
-    from openai import OpenAI  # type: ignore
-    _openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+    from openai import AsyncOpenAI  # type: ignore
+    _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 except Exception:
     _openai_client = None
 
@@ -57,17 +86,27 @@ except Exception:
 # -------------------------------------------------------------------
 # Core helpers
 # -------------------------------------------------------------------
+@functools.lru_cache(maxsize=1)
+def _load_prompt_cached(mtime_ns: int, path: str) -> str:
+    """
+    Reads the prompt file. Keyed by mtime so an edited prompt is picked up without a restart.
+    """
+    return Path(path).read_text(encoding="utf-8")
+
+
 def load_system_prompt() -> str:
     """
-    Load the system prompt spec from disk.
+    Load the system prompt spec from disk (cached in-process until the file changes).
     Raises FileNotFoundError if the prompt is missing.
     """
-    if not PROMPT_PATH.exists():
+    try:
+        st = PROMPT_PATH.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"System prompt not found at {PROMPT_PATH}. "
             "Create app/prompts/system_prompt.txt and paste your spec."
-        )
-    return PROMPT_PATH.read_text(encoding="utf-8")
+        ) from None
+    return _load_prompt_cached(st.st_mtime_ns, str(PROMPT_PATH))
 
 
 def build_user_instruction(req: AnalyzeRequest) -> str:
@@ -92,24 +131,39 @@ def build_user_instruction(req: AnalyzeRequest) -> str:
         )
 
 
-def call_openai(messages: list[dict]) -> str:
+async def stream_openai(messages: list[dict]) -> AsyncIterator[str]:
     """
-    Invokes OpenAI chat completions and returns assistant text.
+    Invokes OpenAI chat completions with stream=True and yields content deltas as they arrive.
     Raises RuntimeError with a helpful message if the client/key is unavailable.
     """
     if _openai_client is None or not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY not configured or OpenAI client unavailable.")
     try:
-        completion = _openai_client.chat.completions.create(
+        stream = await _openai_client.chat.completions.create(
             model=OPENAI_MODEL,
             messages=messages,
             temperature=0.2,
+            stream=True,
         )
-        return completion.choices[0].message.content or ""
+        async for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                yield delta
     except Exception as ex:
         raise RuntimeError(f"OpenAI call failed: {type(ex).__name__}: {ex}") from ex
 
 
+async def call_openai(messages: list[dict]) -> str:
+    """
+    Invokes OpenAI chat completions (streamed) and returns the full assistant text.
+    The event loop is free to serve other requests between chunks.
+    """
+    chunks = [delta async for delta in stream_openai(messages)]
+    return "".join(chunks)
+
+
 def audit_save(
     model: str,
     output_format: str,
@@ -121,27 +175,21 @@ def audit_save(
     """
     Best-effort audit row into SQLite. Never raises outwardly.
     Matches the 'analyses' table defined in app/data/db_config.py.
+    The row is queued and committed in batches by the background writer, off the request path.
     """
     try:
-        with get_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO analyses
-                    (created_at, model, output_format, schema, prompt_chars, input_preview, response_preview)
-                VALUES
-                    (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    datetime.utcnow().isoformat(timespec="seconds") + "Z",
-                    model,
-                    output_format,
-                    schema,
-                    prompt_chars,
-                    input_text[:500],      # preview only
-                    response_text[:1000],  # preview only
-                ),
-            )
-            conn.commit()
+        enqueue_write(
+            _AUDIT_SQL,
+            (
+                utc_timestamp(),
+                model,
+                output_format,
+                schema,
+                prompt_chars,
+                input_text[:INPUT_PREVIEW_CHARS],         # preview only
+                response_text[:RESPONSE_PREVIEW_CHARS],   # preview only
+            ),
+        )
     except Exception:
         # Swallow logging errors to avoid breaking main flow
         pass
@@ -156,32 +204,58 @@ def try_parse_json(text: str) -> tuple[bool, Optional[dict], Optional[str]]:
         (False, None, error_message) on failure
     """
     try:
-        parsed = json.loads(text)
+        parsed = _json.loads(text)
         return True, parsed, None
-    except json.JSONDecodeError as je:
+    except ValueError as je:  # json/orjson JSONDecodeError are both ValueError subclasses
         return False, None, f"Invalid JSON: {je}. Raw: {text[:500]}"
 
 
+def input_id_for(text: str) -> str:
+    """
+    Content id for input_text (must match the client's blake2b digest_size=16 hex).
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def resolve_input(req: AnalyzeRequest) -> AnalyzeRequest:
+    """
+    Returns a request with input_text populated.
+
+    - input_text present: cache it under its server-computed id (never the client's claim).
+    - only input_id present: look it up in the LRU cache.
+
+    Raises LookupError if input_id is unknown or expired; the client should resend input_text.
+    """
+    now = time.monotonic()
+    if req.input_text is not None:
+        key = input_id_for(req.input_text)
+        with _input_cache_lock:
+            _INPUT_CACHE[key] = (now + INPUT_CACHE_TTL_SEC, req.input_text)
+            _INPUT_CACHE.move_to_end(key)
+            while len(_INPUT_CACHE) > INPUT_CACHE_MAX:
+                _INPUT_CACHE.popitem(last=False)
+        return req
+
+    with _input_cache_lock:
+        hit = _INPUT_CACHE.get(req.input_id)
+        if hit is None or hit[0] < now:
+            _INPUT_CACHE.pop(req.input_id, None)
+            raise LookupError(f"Unknown or expired input_id {req.input_id}")
+        _INPUT_CACHE.move_to_end(req.input_id)
+    return req.model_copy(update={"input_text": hit[1]})
+
+
 # -------------------------------------------------------------------
 # Orchestration
 # -------------------------------------------------------------------
-def run_analysis(req: AnalyzeRequest) -> str:
+def _build_messages(req: AnalyzeRequest) -> tuple[list[dict], int]:
     """
-    High-level orchestrator used by the route layer.
-
-    Flow:
-        - Ensure DB exists
-        - Load system prompt
-        - Build user instruction
-        - Call OpenAI
-        - Audit (best-effort)
-        - Return assistant_text (router decides how to shape response)
+    Builds the chat messages for a request.
 
     Returns:
-        assistant_text (str): caller may parse JSON if req.output_format == 'json'
+        (messages, prompt_chars) where prompt_chars is recorded in the audit row
     """
-    # Ensure DB and prompt readiness
-    init_db()
+    # Prompt readiness (DB is initialized once at app startup)
     system_prompt = load_system_prompt()
     user_instruction = build_user_instruction(req)
 
@@ -189,17 +263,57 @@ def run_analysis(req: AnalyzeRequest) -> str:
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_instruction},
     ]
+    return messages, len(system_prompt) + len(user_instruction)
 
-    assistant_text = call_openai(messages)
 
-    # Audit best-effort
+def _audit_request(req: AnalyzeRequest, prompt_chars: int, assistant_text: str) -> None:
     audit_save(
         model=OPENAI_MODEL,
         output_format=req.output_format,
         schema=req.schema if req.output_format == "json" else None,
-        prompt_chars=len(system_prompt) + len(user_instruction),
+        prompt_chars=prompt_chars,
         input_text=req.input_text,
         response_text=assistant_text,
     )
 
+
+async def run_analysis(req: AnalyzeRequest) -> str:
+    """
+    High-level orchestrator used by the route layer.
+
+    Flow:
+        - Load system prompt
+        - Build user instruction
+        - Call OpenAI
+        - Audit (best-effort)
+        - Return assistant_text (router decides how to shape response)
+
+    Returns:
+        assistant_text (str): caller may parse JSON if req.output_format == 'json'
+    """
+    messages, prompt_chars = _build_messages(req)
+
+    assistant_text = await call_openai(messages)
+
+    # Audit best-effort
+    _audit_request(req, prompt_chars, assistant_text)
+
     return assistant_text
+
+
+async def stream_analysis(req: AnalyzeRequest) -> AsyncIterator[str]:
+    """
+    Streaming variant of run_analysis(): yields assistant text deltas as OpenAI emits them,
+    then audits the text once the stream ends. The audit runs in `finally`, so a client
+    disconnect or an error mid-stream still records the (partial) response.
+    """
+    messages, prompt_chars = _build_messages(req)
+
+    chunks: list[str] = []
+    try:
+        async for delta in stream_openai(messages):
+            chunks.append(delta)
+            yield delta
+    finally:
+        # Audit best-effort
+        _audit_request(req, prompt_chars, "".join(chunks))
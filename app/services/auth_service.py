@@ -1,5 +1,5 @@
 from __future__ import annotations
-import os, sqlite3, datetime, jwt, bcrypt
+import os, sqlite3, datetime, jwt, bcrypt, hashlib, time, base64, hmac, json
 from pathlib import Path
 from typing import Optional, Tuple
 from app.data.db_config import get_connection
@@ -9,15 +9,52 @@ JWT_ALG = "HS256"
 ACCESS_MIN = int(os.getenv("JWT_ACCESS_MIN", "60"))
 REFRESH_MIN = int(os.getenv("JWT_REFRESH_MIN", "1440"))
 
+# Verified-login cache: (username, peppered sha256(password)) -> (expires_at, user).
+# Repeat logins within the TTL skip the DB lookup and bcrypt. Deactivation/password
+# changes take effect once the entry expires.
+USER_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL_SEC", "300"))
+USER_CACHE_MAX = 1024
+_USER_CACHE: dict[tuple[str, str], tuple[float, dict]] = {}
+_PEPPER = os.urandom(16)  # per-process; cache keys never leave memory
+
+_USER_SQL = "SELECT id, username, password_hash, role, is_active FROM users WHERE username=?"
+
+# Precomputed at import; checked against when the user is missing/inactive so that path
+# costs exactly one checkpw, the same as a real check (including the very first miss)
+_DUMMY_HASH = bcrypt.hashpw(b"dummy-password", bcrypt.gensalt())
+
+def _cache_key(username: str, password: str) -> tuple[str, str]:
+    return username, hashlib.sha256(password.encode() + _PEPPER).hexdigest()
+
 def verify_user(username: str, password: str) -> Optional[dict]:
-    with get_connection() as con:
-        row = con.execute("SELECT id, username, password_hash, role, is_active FROM users WHERE username=?",
-                          (username,)).fetchone()
-    if not row or not row["is_active"]:
+    key = _cache_key(username, password)
+    hit = _USER_CACHE.get(key)
+    if hit and hit[0] > time.monotonic():
+        return dict(hit[1])
+
+    con = get_connection()
+    row = con.execute(_USER_SQL, (username,)).fetchone()
+    if not row:
+        bcrypt.checkpw(password.encode(), _DUMMY_HASH)
+        return None
+    _id, uname, phash, role, active = row
+    if not active:
+        bcrypt.checkpw(password.encode(), _DUMMY_HASH)
         return None
-    if not bcrypt.checkpw(password.encode(), row["password_hash"].encode()):
+    if not bcrypt.checkpw(password.encode(), phash.encode()):
         return None
-    return dict(row)
+    user = {"id": _id, "username": uname, "password_hash": phash, "role": role, "is_active": active}
+    if len(_USER_CACHE) >= USER_CACHE_MAX:
+        _USER_CACHE.clear()
+    _USER_CACHE[key] = (time.monotonic() + USER_CACHE_TTL, user)
+    return dict(user)
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# HS256 header never changes, so it is serialized once (same compact form PyJWT emits)
+_JWT_HEADER_B64 = _b64url(json.dumps({"alg": JWT_ALG, "typ": "JWT"}, separators=(",", ":")).encode())
+_JWT_KEY = JWT_SECRET.encode()
 
 def _jwt(now: datetime.datetime, sub: str, role: str, minutes: int, typ: str) -> str:
     payload = {
@@ -26,7 +63,11 @@ def _jwt(now: datetime.datetime, sub: str, role: str, minutes: int, typ: str) ->
         "exp": int((now + datetime.timedelta(minutes=minutes)).timestamp()),
         "iss": "aisa.local"
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+    # Equivalent to jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG), with the constant
+    # header pre-encoded once; verification still goes through PyJWT (jwt.decode).
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(json.dumps(payload, separators=(",", ":")).encode())
+    sig = hmac.new(_JWT_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + _b64url(sig)).decode("ascii")
 
 def issue_tokens(username: str, role: str) -> Tuple[str, str]:
     now = datetime.datetime.utcnow()
@@ -1,30 +1,330 @@
 from __future__ import annotations
-import os, textwrap, json
-import requests
+import os, re, textwrap, time, hashlib, contextlib, importlib.util, operator, gzip
+from typing import TYPE_CHECKING, Iterator
+import httpx
+import orjson
 import streamlit as st
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Default text for the input box (one constant instead of an inline dedent at the widget)
+SAMPLE = textwrap.dedent(
+    """\
+    Access denied for UserID 4219 at Gate 4
+    Last successful login: 2025-10-31
+    User clearance: Secret
+    Facility requirement: Top Secret
+"""
+)
+
+# Widget option lists (shared constants rather than literals rebuilt inline)
+FORMAT_OPTIONS = ("json", "markdown")
+SCHEMA_OPTIONS = ("risk_assessment", "event_summary", "policy_alignment")
+INPUT_OPTIONS = ("logs", "access_records", "policy_text")
+
+# Streamlit expects page config on every run (it only errors if called twice in one run),
+# so this stays unconditional to keep the wide layout across reruns.
 st.set_page_config(page_title="AI Security Analyst Assistant", layout="wide")
 
 # ---------------- Session State ----------------
-if "is_authenticated" not in st.session_state:
-    st.session_state.is_authenticated = False
-if "username" not in st.session_state:
-    st.session_state.username = None
-if "access_token" not in st.session_state:
-    st.session_state.access_token = None
-if "refresh_token" not in st.session_state:
-    st.session_state.refresh_token = None
-if "api_base" not in st.session_state:
-    st.session_state.api_base = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
+# Seeded once per session; later reruns skip straight past this block
+if "_state_init" not in st.session_state:
+    st.session_state.update(
+        {
+            "is_authenticated": False,
+            "username": None,
+            "access_token": None,
+            "refresh_token": None,
+            "api_base": os.getenv("API_BASE_URL", "http://127.0.0.1:8000"),
+            "_state_init": True,
+        }
+    )
 
 def get_api_base() -> str:
     return st.session_state.api_base.rstrip("/")
 
 # ---------------- Utilities ----------------
+@st.cache_resource
+def _client() -> httpx.Client:
+    """
+    Shared keep-alive client so reruns reuse pooled connections instead of reconnecting.
+    With HTTP/2 (TLS backends), concurrent health/analyze calls multiplex over one connection.
+    httpx advertises Accept-Encoding gzip/deflate (plus br/zstd when brotli/zstandard are
+    installed) and transparently decodes compressed responses.
+    """
+    # HTTP/2 needs the optional 'h2' package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it
+    http2 = importlib.util.find_spec("h2") is not None
+    limits = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+    # Transport retries cover connection failures only, so POST /analyze is never replayed
+    transport = httpx.HTTPTransport(http2=http2, limits=limits, retries=2)
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(60.0, connect=1.0))
+
 def _errbox(title: str, detail: str):
     with st.expander(f"⚠️ {title}", expanded=True):
         st.code(detail)
 
+HEALTH_WINDOW = 10  # rolling latency samples kept in session state
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _probe_health(api_base: str):
+    """
+    GET /health with a short connect budget; memoized for a few seconds so repeated
+    clicks don't re-probe. Returns (status_code, latency_ms, payload, measured_at).
+    """
+    t0 = time.perf_counter()
+    r = _client().get(f"{api_base}/health", timeout=httpx.Timeout(3.0, connect=1.0))
+    latency_ms = (time.perf_counter() - t0) * 1000
+    try:
+        payload = orjson.loads(r.content)
+    except ValueError:
+        payload = {"raw": r.text[:4000]}
+    return r.status_code, latency_ms, payload, time.time()
+
+@contextlib.contextmanager
+def _open_analyze_stream(api_base: str, body: dict) -> Iterator[httpx.Response]:
+    """
+    POST /analyze/stream, sending only input_id when the server has already seen this text.
+    Falls back to the full input_text if the server answers 409 (id unknown/expired).
+    The streamed response is closed when the with-block exits.
+    """
+    input_id = hashlib.blake2b(body["input_text"].encode("utf-8"), digest_size=16).hexdigest()
+    uploaded = st.session_state.setdefault("_uploaded_hashes", set())
+    wire = {k: v for k, v in body.items() if k != "input_text"}
+    wire["input_id"] = input_id
+    if input_id not in uploaded:
+        wire["input_text"] = body["input_text"]
+
+    def _post(payload: dict) -> httpx.Response:
+        content, headers = _encode_body(payload)
+        # Read timeout applies per chunk, so long generations are fine as long as tokens keep arriving
+        request = _client().build_request(
+            "POST",
+            f"{api_base}/analyze/stream",
+            # SSE must not be compressed (gzip buffers frames); ask for identity explicitly
+            headers={**headers, **auth_headers(), "Accept-Encoding": "identity"},
+            content=content,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+        return _client().send(request, stream=True)
+
+    r = _post(wire)
+    try:
+        if r.status_code == 409 and "input_text" not in wire:
+            r.close()
+            uploaded.discard(input_id)
+            wire["input_text"] = body["input_text"]
+            r = _post(wire)
+        if r.is_success:
+            uploaded.add(input_id)
+        yield r
+    finally:
+        r.close()
+
+ERROR_BODY_LIMIT = 4000
+
+def _read_capped(r: httpx.Response, limit: int = ERROR_BODY_LIMIT) -> str:
+    """Reads at most `limit` bytes of a streamed body, so a huge error page is never buffered."""
+    buf = bytearray()
+    for chunk in r.iter_bytes(4096):
+        buf.extend(chunk)
+        if len(buf) >= limit:
+            break
+    return buf[:limit].decode(r.encoding or "utf-8", "replace")
+
+def _sse_text(r: httpx.Response, state: dict):
+    """
+    Yields text_delta payloads from an /analyze/stream SSE response.
+    Sets state["done"] = True only when the server's "done" frame arrives, so a stream that
+    just hit EOF (dropped connection, killed worker) is distinguishable from a finished one.
+    """
+    state["done"] = False
+    for line in r.iter_lines():
+        if not line or not line.startswith("data: "):
+            continue
+        event = orjson.loads(line[len("data: "):])
+        kind = event.get("type")
+        if kind == "text_delta":
+            yield event.get("text", "")
+        elif kind == "error":
+            raise RuntimeError(event.get("detail", "stream error"))
+        elif kind == "done":
+            state["done"] = True
+            return
+
+class _FindingsScanner:
+    """
+    Incrementally extracts complete objects from the "findings" array of a JSON document
+    that is still streaming in, so findings can be shown before the document is complete.
+    """
+
+    _ARRAY_START = re.compile(r'"findings"\s*:\s*\[')
+
+    def __init__(self):
+        self.findings: list[dict] = []
+        self._text = ""
+        self._pos = -1        # scan position inside the array (-1: array not found yet)
+        self._depth = 0
+        self._start = 0
+        self._in_str = False
+        self._esc = False
+        self._done = False
+
+    def feed(self, delta: str) -> int:
+        """Appends a text delta; returns how many new findings were completed."""
+        self._text += delta
+        if self._done:
+            return 0
+        if self._pos < 0:
+            m = self._ARRAY_START.search(self._text)
+            if not m:
+                return 0
+            self._pos = m.end()
+        before = len(self.findings)
+        text, i = self._text, self._pos
+        while i < len(text):
+            c = text[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+            elif c == '"':
+                self._in_str = True
+            elif c == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif c == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = orjson.loads(text[self._start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        self.findings.append(obj)
+            elif c == "]" and self._depth == 0:
+                self._done = True
+                break
+            i += 1
+        self._pos = i
+        return len(self.findings) - before
+
+def _cache_get(key: str):
+    """
+    Completed analysis text for an identical request, if still fresh.
+    Kept per session (not st.cache_data) so one user's results are never served to another.
+    """
+    cache = st.session_state.setdefault("_analysis_cache", {})
+    hit = cache.get(key)
+    if hit and time.monotonic() - hit[0] < ANALYZE_CACHE_TTL_SEC:
+        return hit[1]
+    cache.pop(key, None)
+    return None
+
+def _cache_put(key: str, text: str):
+    cache = st.session_state.setdefault("_analysis_cache", {})
+    cache.pop(key, None)
+    if len(cache) >= ANALYZE_CACHE_MAX:
+        cache.pop(next(iter(cache)))  # evict the oldest entry
+    cache[key] = (time.monotonic(), text)
+
+def _is_cacheable(text: str, output_format: str, stream_state: dict) -> bool:
+    """Only fully finished results (and, for JSON, parseable ones) may be replayed from cache."""
+    if not stream_state.get("done"):
+        return False
+    if output_format == "json":
+        try:
+            orjson.loads(text)
+        except ValueError:
+            return False
+    return True
+
+def _render_analysis(text: str, output_format: str):
+    if output_format != "json":
+        st.markdown(text)
+        return
+    try:
+        data = {"data": orjson.loads(text)}
+    except ValueError as je:
+        _errbox("Assistant returned invalid JSON", f"{je}\n\n{text[:4000]}")
+        return
+    _render_json(data)
+
+RAW_JSON_INLINE_LIMIT = 200_000  # bytes; larger payloads are offered as a download instead
+
+def _render_json(data: dict):
+    raw = orjson.dumps(data)
+    if len(raw) > RAW_JSON_INLINE_LIMIT:
+        # Even a collapsed expander ships its contents to the browser, so skip st.json entirely
+        summary = data["data"].get("summary") if isinstance(data.get("data"), dict) else None
+        if summary is not None:
+            st.write(summary)
+        st.download_button("Download full JSON", raw, "response.json", "application/json")
+    else:
+        with st.expander("Raw JSON", expanded=False):
+            st.json(data)
+    # Simple findings table for risk_assessment
+    if isinstance(data.get("data"), dict) and data["data"].get("type") == "risk_assessment":
+        findings = [f for f in data["data"].get("findings", []) if isinstance(f, dict)]
+        if findings:
+            st.dataframe(_findings_table(findings), use_container_width=True)
+
+def _as_str(v):
+    return None if v is None else str(v)
+
+def _as_float(v):
+    try:
+        return None if v is None else float(v)
+    except (TypeError, ValueError):
+        return None
+
+FINDING_KEYS = ("id", "title", "severity", "risk_score", "confidence")
+_get_finding = operator.itemgetter(*FINDING_KEYS)
+
+def _finding_row(f: dict) -> tuple:
+    # itemgetter does all five lookups in C; fall back to .get only for incomplete findings
+    try:
+        return _get_finding(f)
+    except KeyError:
+        return tuple(f.get(k) for k in FINDING_KEYS)
+
+def _findings_table(findings: list[dict]) -> "pa.Table":
+    """Column-wise Arrow table with explicit dtypes; Streamlit ships it as one IPC buffer."""
+    import pyarrow as pa  # only needed once a risk_assessment result is rendered
+
+    ids, titles, severities, scores, confidences = (
+        zip(*map(_finding_row, findings)) if findings else ((),) * len(FINDING_KEYS)
+    )
+    return pa.table(
+        {
+            "ID": pa.array(list(map(_as_str, ids)), pa.string()),
+            "Title": pa.array(list(map(_as_str, titles)), pa.string()),
+            "Severity": pa.array(list(map(_as_str, severities)), pa.string()),
+            "Score": pa.array(list(map(_as_float, scores)), pa.float32()),
+            "Confidence": pa.array(list(map(_as_float, confidences)), pa.float32()),
+        }
+    )
+
+ANALYZE_CACHE_TTL_SEC = 600
+ANALYZE_CACHE_MAX = 64
+
+def _body_hash(body: dict) -> str:
+    return hashlib.sha256(orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_MIN_BYTES = 1024  # small bodies aren't worth the compression CPU
+
+def _encode_body(payload: dict) -> tuple[bytes, dict]:
+    """JSON-encodes a request body, gzipping it when large (raw logs compress well)."""
+    raw = orjson.dumps(payload)
+    if len(raw) > GZIP_MIN_BYTES:
+        return gzip.compress(raw, 5), {**JSON_HEADERS, "Content-Encoding": "gzip"}
+    return raw, JSON_HEADERS
+
 def auth_headers():
     t = st.session_state.get("access_token")
     return {"Authorization": f"Bearer {t}"} if t else {}
@@ -47,13 +347,14 @@ def show_login():
     if submitted:
         api_base = get_api_base()
         try:
-            r = requests.post(
+            r = _client().post(
                 f"{api_base}/auth/login",
-                json={"username": username, "password": password},
+                content=orjson.dumps({"username": username, "password": password}),
+                headers=JSON_HEADERS,
                 timeout=20,
             )
-            if r.ok:
-                tokens = r.json()
+            if r.is_success:
+                tokens = orjson.loads(r.content)
                 st.session_state.is_authenticated = True
                 st.session_state.username = username
                 st.session_state.access_token = tokens["access_token"]
@@ -77,6 +378,9 @@ if not st.session_state.is_authenticated:
 # ---------------- Authenticated UI ----------------
 # Sidebar shows only after login
 st.sidebar.success(f"Logged in as: {st.session_state.username}")
+# Per-user data that must not survive into the next sign-in on the same browser session
+USER_SCOPED_KEYS = ("_analysis_cache", "_uploaded_hashes")
+
 def _logout():
     st.session_state.update(
         {
@@ -86,6 +390,8 @@ def _logout():
             "refresh_token": None,
         }
     )
+    for key in USER_SCOPED_KEYS:
+        st.session_state.pop(key, None)
 st.sidebar.button("Logout", on_click=_logout)
 
 # Server controls (read-only api_base, but you can make it editable if you prefer)
@@ -96,39 +402,48 @@ st.sidebar.text_input(
     key="api_base_readonly",
     disabled=True,
 )
+api_base = get_api_base()  # stripped once per rerun, shared by health + analyze
+
 if st.sidebar.button("Check Health"):
     try:
-        r = requests.get(f"{get_api_base()}/health", timeout=10)
-        st.sidebar.json(r.json())
+        status, latency_ms, payload, measured_at = _probe_health(api_base)
+        samples = st.session_state.setdefault("_health_samples", [])
+        if not samples or samples[-1][0] != measured_at:  # cached probes aren't new samples
+            samples.append((measured_at, latency_ms))
+            del samples[:-HEALTH_WINDOW]
+        mean_ms = sum(ms for _, ms in samples) / len(samples)
+        msg = f"HTTP {status} · {latency_ms:.0f} ms (avg {mean_ms:.0f} ms over {len(samples)})"
+        (st.sidebar.success if status == 200 else st.sidebar.error)(msg)
+        st.sidebar.json(payload)
     except Exception as ex:
+        st.sidebar.error("Backend unreachable")
         _errbox("Health check failed", f"{type(ex).__name__}: {ex}")
 
-st.sidebar.header("Output")
-output_format = st.sidebar.radio("Format", ["json", "markdown"], index=0)
-schema = st.sidebar.selectbox(
-    "Schema", ["risk_assessment", "event_summary", "policy_alignment"], index=0
-)
+# Settings are batched in a form: edits don't rerun the script until "Apply" is pressed
+with st.sidebar.form("cfg", clear_on_submit=False):
+    st.header("Output")
+    output_format = st.radio("Format", FORMAT_OPTIONS, index=0)
+    schema = st.selectbox("Schema", SCHEMA_OPTIONS, index=0)
 
-st.sidebar.header("Context")
-time_window = st.sidebar.text_input("Time window (optional)", value="Not specified")
-inputs_selected = st.sidebar.multiselect(
-    "Inputs", ["logs", "access_records", "policy_text"], default=["logs", "access_records", "policy_text"]
-)
+    st.header("Context")
+    time_window = st.text_input("Time window (optional)", value="Not specified")
+    inputs_selected = st.multiselect("Inputs", INPUT_OPTIONS, default=list(INPUT_OPTIONS))
+    st.form_submit_button("Apply")
 
 # ----- Main: input & action -----
 st.title("🔐 AI Security Analyst Assistant")
-# sample = textwrap.dedent(
-#     """\
-#     Access denied for UserID 4219 at Gate 4
-#     Last successful login: 2025-10-31
-#     User clearance: Secret
-#     Facility requirement: Top Secret
-# """
-# )
-txt = st.text_area("Paste logs / access records / policies", textwrap.dedent(), height=180)
-
-if st.button("Analyze", type="primary"):
-    api_base = get_api_base()
+with st.form("analyze", clear_on_submit=False):
+    txt = st.text_area("Paste logs / access records / policies", SAMPLE, height=180)
+    force_refresh = st.checkbox("Force refresh (bypass cached result)", value=False)
+    # Sidebar edits only take effect after "Apply"; show what Analyze will actually send
+    st.caption(
+        f"Applied settings: format **{output_format}** · schema **{schema}** · "
+        f"window **{time_window or 'none'}** · inputs **{', '.join(inputs_selected) or 'all'}** "
+        "(press Apply in the sidebar to change)"
+    )
+    submitted = st.form_submit_button("Analyze", type="primary")
+
+if submitted:
     body = {
         "input_text": txt,
         "output_format": output_format,
@@ -136,31 +451,51 @@ if st.button("Analyze", type="primary"):
         "time_window": (time_window or None),
         "inputs": inputs_selected or None,
     }
+    cache_key = _body_hash({"api_base": api_base, "body": body})
+    if not force_refresh:
+        # Repeat/duplicate submissions re-show the finished result instead of re-running the LLM.
+        # A double-click needs no extra guard: the second submit makes Streamlit stop the first run.
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            st.caption("Cached result (tick 'Force refresh' to re-run)")
+            _render_analysis(cached, output_format)
+            st.stop()
     try:
-        r = requests.post(
-            f"{api_base}/analyze", headers=auth_headers(), json=body, timeout=60
-        )
-        st.write(f"HTTP {r.status_code}")
-        ct = r.headers.get("content-type", "")
-        if "json" in ct:
-            data = r.json()
-            st.json(data)
-            # Simple findings table for risk_assessment
-            if isinstance(data, dict) and data.get("data", {}).get("type") == "risk_assessment":
-                rows = []
-                for f in data["data"].get("findings", []):
-                    rows.append(
-                        {
-                            "ID": f.get("id"),
-                            "Title": f.get("title"),
-                            "Severity": f.get("severity"),
-                            "Score": f.get("risk_score"),
-                            "Confidence": f.get("confidence"),
-                        }
-                    )
-                if rows:
-                    st.dataframe(rows, use_container_width=True)
-        else:
-            st.text(r.text[:4000])
+        with _open_analyze_stream(api_base, body) as r:
+            st.write(f"HTTP {r.status_code}")
+            ct = r.headers.get("content-type", "")
+            if r.is_success and "text/event-stream" in ct:
+                stream_state: dict = {}
+                if output_format == "json":
+                    with st.status("Analyzing…", expanded=True) as status:
+                        live_table = st.empty()
+                        scanner = _FindingsScanner()
+
+                        def _deltas():
+                            # Render each finding as soon as its object closes in the stream
+                            for delta in _sse_text(r, stream_state):
+                                if scanner.feed(delta):
+                                    live_table.dataframe(
+                                        _findings_table(scanner.findings), use_container_width=True
+                                    )
+                                yield delta
+
+                        # Plain container, not an expander: st.status is itself an expander and
+                        # Streamlit < 1.46 rejects nested expanders
+                        with st.container():
+                            text = st.write_stream(_deltas())
+                        status.update(label="Analysis complete", state="complete", expanded=False)
+                    live_table.empty()  # the final render below draws the complete table
+                    _render_analysis(text, output_format)
+                else:
+                    text = st.write_stream(_sse_text(r, stream_state))
+                if _is_cacheable(text, output_format, stream_state):
+                    _cache_put(cache_key, text)
+                else:
+                    st.warning("Result not cached (stream incomplete or invalid JSON); Analyze again to retry.")
+            elif "json" in ct:
+                st.json(orjson.loads(r.read()))
+            else:
+                st.text(_read_capped(r))
     except Exception as ex:
         _errbox("Analyze failed", f"{type(ex).__name__}: {ex}")